@@ -1,11 +1,14 @@
-from codegen_sandbox.sandbox import BaseCodegenSandbox, init_codegen_sandbox
+from codegen_sandbox.sandbox import BaseCodegenSandbox, init_codegen_sandbox, prune_image_cache
 from codegen_sandbox.error import SandboxError, SandboxRequirementsError
 from codegen_sandbox.model import SandboxResponse
+from codegen_sandbox.pool import CodegenSandboxPool
 
 
 __all__ = [
     "init_codegen_sandbox",
     "BaseCodegenSandbox",
+    "CodegenSandboxPool",
+    "prune_image_cache",
     "SandboxError",
     "SandboxRequirementsError",
     "SandboxResponse",
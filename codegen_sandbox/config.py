@@ -1,7 +1,7 @@
 """module that standardizes the configuration of a sandbox"""
 
 import typing
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import lru_cache as cache
 
 import psutil
@@ -11,10 +11,33 @@ _max_mem_limit = int(psutil.virtual_memory().total * 0.99)
 _max_cpu_quota = int(psutil.cpu_count(logical=True) * 100000 * 0.99)
 
 
+_mem_limit_LUT = {
+    "k": 1024,
+    "m": 1024**2,
+    "g": 1024**3
+}
+
+
+@cache(maxsize=None)
+def _mem_limit_to_int(mem_limit: str) -> int:
+    if mem_limit.isdigit():
+        return int(mem_limit)
+
+    value, measure = mem_limit[:-1], mem_limit[-1].lower()
+
+    return int(value) * _mem_limit_LUT[measure]
+
+
 @dataclass
 class SandboxConfig:
     mem_limit: str
     cpu_quota: int
+    mem_limit_bytes: int = field(init=False, repr=False)
+    cpus: int = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.mem_limit_bytes = _mem_limit_to_int(self.mem_limit)
+        self.cpus = -(-self.cpu_quota // 100000)
 
 
 readymade = {
@@ -29,21 +52,6 @@ readymade = {
 }
 
 
-def _mem_limit_to_int(mem_limit: str) -> int:
-    if mem_limit.isdigit():
-        return int(mem_limit)
-    
-    LUT = {
-        "k": 1024, 
-        "m": 1024**2,
-        "g": 1024**3
-    }
-
-    value, measure = mem_limit[:-1], mem_limit[-1]
-
-    return int(value) * LUT[measure]
-
-
 @cache(maxsize=1)
 def filtering_available() -> typing.Tuple[typing.Set[str], str]:
     """available sandbox config based on system resources"""
@@ -51,7 +59,7 @@ def filtering_available() -> typing.Tuple[typing.Set[str], str]:
     max_available_config = "null"
 
     for naming, config in readymade.items():
-        if _mem_limit_to_int(config.mem_limit) > _max_mem_limit:
+        if config.mem_limit_bytes > _max_mem_limit:
             break
 
         if config.cpu_quota > _max_cpu_quota:
@@ -1,5 +1,6 @@
 compliance_script = """
 const { exec } = require('child_process');
+const fs = require('fs');
 const semver = require('semver');
 
 
@@ -7,39 +8,57 @@ class SandboxRequirementsError extends Error {
     constructor(requirements) {
         const message = `The following packages are missing or have conflicts: ${requirements.join(', ')}`;
         super(message);
+        this.name = 'SandboxRequirementsError';
     }
 }
 
 
-function _single_compliance(package) {
+function _installed_dependencies() {
     return new Promise((resolve) => {
-        const [requirement, specifier] = package.split('@');
-
-        exec(`npm list ${requirement} --depth=0 --json`, (error, stdout) => {
-            if (error) {
-                resolve(package);
-                return;
-            }
-
+        // a single listing of the installed packages, rather than one npm process per requirement
+        exec('npm ls --prefix {{prefix}} --depth=0 --json', (_, stdout) => {
             try {
-                const version = JSON.parse(stdout).dependencies[requirement].version;
-
-                if (specifier && !semver.satisfies(version, specifier)) {
-                    resolve(`${package} (version conflict: available ${version})`);
-                } else {
-                    resolve(null);
-                }
+                resolve(JSON.parse(stdout).dependencies || {});
             } catch (_) {
-                resolve(`${package} (invalid version requirement)`);
+                resolve({});
             }
         });
     });
 }
 
 
+function _single_compliance(requirement, dependencies) {
+    // the version separator is the last '@', scoped packages start with one
+    const separator = requirement.lastIndexOf('@');
+
+    const [name, specifier] = separator > 0
+        ? [requirement.slice(0, separator), requirement.slice(separator + 1)]
+        : [requirement, ''];
+
+    const version = (dependencies[name] || {}).version;
+
+    if (!version) {
+        return requirement;
+    }
+
+    if (specifier && semver.validRange(specifier) === null) {
+        return `${requirement} (invalid version requirement)`;
+    }
+
+    if (specifier && !semver.satisfies(version, specifier)) {
+        return `${requirement} (version conflict: available ${version})`;
+    }
+
+    return null;
+}
+
+
 async function compliance(requirements) {
-    let missing = await Promise.all(requirements.map(_single_compliance));
-    missing = missing.filter(result => result !== null);
+    const dependencies = await _installed_dependencies();
+
+    const missing = requirements
+        .map((requirement) => _single_compliance(requirement, dependencies))
+        .filter((result) => result !== null);
 
     if (missing.length > 0) {
         throw new SandboxRequirementsError(missing);
@@ -48,14 +67,14 @@ async function compliance(requirements) {
 
 
 (async () => {
-    const requirements = {{requirements}};
+    const requirements = JSON.parse(fs.readFileSync(0, 'utf8'));
 
     try {
         await compliance(requirements);
         process.exit(0);
     } catch (e) {
-        console.error(e.message);
+        console.error(e.toString());
         process.exit(1);
     }
 })();
-"""
\ No newline at end of file
+"""
@@ -1,25 +1,46 @@
-import textwrap
+import shlex
 import typing
 
 from codegen_sandbox.node.requirements import compliance_script
+from codegen_sandbox.node.worker import worker_script
 from codegen_sandbox.sandbox import BaseCodegenSandbox
 
 
+# packages live in /node_modules, an ancestor of the working directory, so that both
+# require() and import() resolve them while reset() leaves them untouched
+_packages_prefix = "/"
+
+# templated once, the script is then uploaded as is to each sandbox
+_compliance_script = compliance_script.replace("{{prefix}}", _packages_prefix)
+
+
 class NodejsCodegenSandbox(BaseCodegenSandbox):
     """Sandbox environment for executing Node.js code safely."""
+    _compliance_path = "/opt/codegen-sandbox/compliance.js"
 
     def _init_image_config(self):
         self._base_image_name = "node:lts-slim"
         self._coding_language = "node"
 
     def _custom_image_dockerfile(self, image_name: str) -> str:
-        return f"FROM {image_name}\nWORKDIR /sandbox\nRUN npm install {' '.join(self.requirements + ['semver@^7.0.0'])}"
+        # stable layers first, so that the build cache is reused across requirements
+        requirements = " ".join(shlex.quote(package) for package in sorted(set(self.requirements)))
+
+        return (
+            f"FROM {image_name}\n"
+            f"WORKDIR {self._workdir}\n"
+            f"RUN npm install --no-audit --no-fund --prefer-offline --prefix {_packages_prefix} 'semver@^7.0.0'\n"
+            f"RUN npm install --no-audit --no-fund --prefer-offline --prefix {_packages_prefix} {requirements}\n"
+        )
+
+    def _compliance_script(self) -> str:
+        return _compliance_script
+
+    def _compliance_command(self) -> typing.List[str]:
+        return ["node", self._compliance_path]
 
-    def _compliance_script(self, requirements: typing.List[str]) -> str:
-        return compliance_script.replace("{{requirements}}", str(requirements))
+    def _prepare_code_command(self) -> typing.List[str]:
+        return ["node", "-"]
 
-    def _prepare_code_command(self, code: str) -> str:
-        code = textwrap.dedent(code)
-        escaped_code = code.replace("'", "'\"'\"'")
-        exec_command = f"node -e '{escaped_code}'"
-        return exec_command
+    def _worker_command(self) -> typing.List[str]:
+        return ["node", "-e", worker_script]
@@ -0,0 +1,199 @@
+worker_script = r"""
+const { spawnSync } = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+
+function _run(request) {
+    const result = spawnSync(request.command[0], request.command.slice(1), {
+        input: request.stdin,
+        env: { ...process.env, ...request.env },
+        timeout: request.timeout ? request.timeout * 1000 : undefined,
+        maxBuffer: Infinity,
+        // the code runs in its own process group, so that a timeout reaches all of its descendants
+        detached: true,
+    });
+
+    if (result.error && result.error.code === 'ETIMEDOUT') {
+        try {
+            process.kill(-result.pid, 'SIGKILL');
+        } catch (_) {
+            // the group is already gone
+        }
+    }
+
+    let exit_code;
+    let stderr = result.stderr ? result.stderr.toString('utf8') : '';
+
+    if (result.error && result.error.code === 'ETIMEDOUT') {
+        exit_code = 124;
+    } else if (result.error) {
+        exit_code = 127;
+        stderr = result.error.toString();
+    } else if (result.status !== null) {
+        exit_code = result.status;
+    } else {
+        // processes killed by a signal report as a shell would
+        exit_code = 128 + os.constants.signals[result.signal];
+    }
+
+    return {
+        exit_code: exit_code,
+        stdout: result.stdout ? result.stdout.toString('utf8') : '',
+        stderr: stderr,
+    };
+}
+
+
+function _delete_file(request) {
+    fs.rmSync(request.path, { force: true });
+    return {};
+}
+
+
+function _write_dir(request) {
+    fs.mkdirSync(request.path, { recursive: true });
+    return {};
+}
+
+
+function _delete_dir(request) {
+    fs.rmSync(request.path, { recursive: true, force: true });
+    return {};
+}
+
+
+function _isdir(request) {
+    const stats = fs.statSync(request.path, { throwIfNoEntry: false });
+    return { isdir: stats !== undefined && stats.isDirectory() };
+}
+
+
+function _parents() {
+    const parents = new Map();
+
+    for (const entry of fs.readdirSync('/proc')) {
+        if (!/^\d+$/.test(entry)) {
+            continue;
+        }
+
+        let stat;
+
+        try {
+            stat = fs.readFileSync(`/proc/${entry}/stat`, 'utf8');
+        } catch (_) {
+            continue;
+        }
+
+        const [state, ppid] = stat.slice(stat.lastIndexOf(')') + 1).trim().split(' ');
+
+        if (state !== 'Z') {
+            parents.set(Number(entry), Number(ppid));
+        }
+    }
+
+    return parents;
+}
+
+
+function _kill_all(select) {
+    // processes may fork while being killed, hence a few rounds
+    for (let round = 0; round < 8; round++) {
+        const pids = [..._parents().keys()].filter(select);
+
+        if (!pids.length) {
+            return;
+        }
+
+        for (const pid of pids) {
+            try {
+                process.kill(pid, 'SIGKILL');
+            } catch (_) {
+                // the process is already gone
+            }
+        }
+    }
+}
+
+
+function _kill_strays() {
+    // init, its first child (the keepalive, started before any code could run) and the worker survive
+    const children = [..._parents()].filter(([_, ppid]) => ppid === 1).map(([pid]) => pid);
+    const keep = new Set([1, process.pid, children.length ? Math.min(...children) : 1]);
+
+    _kill_all((pid) => !keep.has(pid));
+}
+
+
+function _environ(pid) {
+    try {
+        return fs.readFileSync(`/proc/${pid}/environ`, 'utf8').split('\0');
+    } catch (_) {
+        return [];
+    }
+}
+
+
+function _kill(request) {
+    // the variable is inherited, so that the descendants of the process are killed too
+    _kill_all((pid) => _environ(pid).includes(request.marker));
+    return {};
+}
+
+
+function _reset(request) {
+    _kill_strays();
+
+    for (const directory of request.paths) {
+        for (const entry of fs.readdirSync(directory)) {
+            fs.rmSync(path.join(directory, entry), { recursive: true, force: true });
+        }
+    }
+
+    return {};
+}
+
+
+const operations = {
+    run: _run,
+    delete_file: _delete_file,
+    write_dir: _write_dir,
+    delete_dir: _delete_dir,
+    isdir: _isdir,
+    reset: _reset,
+    kill: _kill,
+};
+
+
+let buffer = Buffer.alloc(0);
+
+process.stdin.on('data', (chunk) => {
+    buffer = Buffer.concat([buffer, chunk]);
+
+    while (buffer.length >= 4) {
+        const size = buffer.readUInt32BE(0);
+
+        if (buffer.length < 4 + size) {
+            break;
+        }
+
+        const request = JSON.parse(buffer.subarray(4, 4 + size).toString('utf8'));
+        buffer = buffer.subarray(4 + size);
+
+        let response;
+
+        try {
+            response = { ...operations[request.op](request), ok: true };
+        } catch (e) {
+            response = { ok: false, error: e.toString() };
+        }
+
+        const payload = Buffer.from(JSON.stringify(response), 'utf8');
+        const header = Buffer.alloc(4);
+        header.writeUInt32BE(payload.length);
+
+        process.stdout.write(Buffer.concat([header, payload]));
+    }
+});
+"""
@@ -0,0 +1,193 @@
+"""module that keeps warm sandboxes around for reuse"""
+
+import collections
+import threading
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+
+from codegen_sandbox.error import SandboxError
+from codegen_sandbox.sandbox import BaseCodegenSandbox, get_client, init_codegen_sandbox
+
+
+_PoolKey = typing.Tuple[str, typing.Optional[str], typing.Tuple[str, ...], str, str]
+
+
+class CodegenSandboxPool:
+    """
+    Pool of warm sandboxes for executing code safely.
+
+    Sandboxes released to the pool are reset and kept running, so that the next request
+    with the same options checks one out instead of starting a new container.
+
+    Attributes:
+        client (docker.DockerClient): Docker client shared by the sandboxes in the pool.
+        max_idle (int): Maximum number of idle sandboxes kept for the same options.
+    """
+    client: docker.DockerClient
+    max_idle: int
+
+    def __init__(self, max_idle: int = 8, client: typing.Optional[docker.DockerClient] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            max_idle (int, optional): Maximum number of idle sandboxes kept for the same options. Defaults to 8.
+            client (docker.DockerClient, optional): Docker client to use. Defaults to None, i.e., the shared client.
+        """
+        self.client = client or get_client()
+        self.max_idle = max_idle
+
+        self._idle: typing.DefaultDict[_PoolKey, typing.Deque[BaseCodegenSandbox]] = collections.defaultdict(collections.deque)
+        self._checked_out: typing.Dict[BaseCodegenSandbox, _PoolKey] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pool_key(
+        coding_language: str,
+        custom_image_name: typing.Optional[str],
+        requirements: typing.Optional[typing.List[str]],
+        network_mode: str,
+        config: str
+    ) -> _PoolKey:
+        # equal requirements in any order build the same image, hence share the same sandboxes
+        return coding_language, custom_image_name, tuple(sorted(set(requirements or ()))), network_mode, config
+
+    def _create_sandbox(self, key: _PoolKey) -> BaseCodegenSandbox:
+        coding_language, custom_image_name, requirements, network_mode, config = key
+
+        return init_codegen_sandbox(
+            coding_language,
+            custom_image_name=custom_image_name,
+            requirements=list(requirements),
+            network_mode=network_mode,
+            config=config,
+            client=self.client
+        )
+
+    def _add_idle(self, key: _PoolKey, sandboxes: typing.List[BaseCodegenSandbox]):
+        """Add idle sandboxes to the pool, closing the least recently used above the limit"""
+        evicted = []
+
+        with self._lock:
+            idle = self._idle[key]
+            idle.extend(sandboxes)
+
+            while len(idle) > self.max_idle:
+                evicted.append(idle.popleft())
+
+        for sandbox in evicted:
+            sandbox.close()
+
+    def get_sandbox(
+        self,
+        coding_language: str,
+        *,
+        custom_image_name: typing.Optional[str] = None,
+        requirements: typing.Optional[typing.List[str]] = None,
+        network_mode: str = "none",
+        config: str = "small"
+    ) -> BaseCodegenSandbox:
+        """
+        Check out a sandbox from the pool, starting a new one if none is idle.
+
+        Args:
+            coding_language (str): Coding language to use for the sandbox.
+            custom_image_name (str, optional): Name of a custom Docker image to use. Defaults to None.
+            requirements (list, optional): List of packages to install in the sandbox. Defaults to None.
+            network_mode (str, optional): Network mode to use for the sandbox. Defaults to "none".
+            config (str, optional): Ready-made specs configuration for the sandbox. Defaults to "small".
+
+        Returns:
+            BaseCodegenSandbox: Instance of the codegen sandbox
+        """
+        key = self._pool_key(coding_language, custom_image_name, requirements, network_mode, config)
+
+        with self._lock:
+            idle = self._idle.get(key)
+            sandbox = idle.pop() if idle else None
+
+        if sandbox is None:
+            sandbox = self._create_sandbox(key)
+
+        with self._lock:
+            self._checked_out[sandbox] = key
+
+        return sandbox
+
+    def release_sandbox(self, sandbox: BaseCodegenSandbox):
+        """
+        Return a sandbox to the pool, resetting it for the next request.
+
+        Sandboxes that fail to reset are closed instead.
+
+        Args:
+            sandbox (BaseCodegenSandbox): Sandbox checked out from this pool.
+
+        Raises:
+            ValueError: If the sandbox was not checked out from this pool.
+        """
+        with self._lock:
+            key = self._checked_out.pop(sandbox, None)
+
+        if key is None:
+            raise ValueError("sandbox not checked out from this pool")
+
+        try:
+            sandbox.reset()
+        except SandboxError:
+            sandbox.close()
+            return
+
+        self._add_idle(key, [sandbox])
+
+    def prewarm(
+        self,
+        count: int,
+        coding_language: str,
+        *,
+        custom_image_name: typing.Optional[str] = None,
+        requirements: typing.Optional[typing.List[str]] = None,
+        network_mode: str = "none",
+        config: str = "small"
+    ):
+        """
+        Start idle sandboxes in parallel, so that the next requests skip the startup.
+
+        Args:
+            count (int): Number of sandboxes to start.
+            coding_language (str): Coding language to use for the sandbox.
+            custom_image_name (str, optional): Name of a custom Docker image to use. Defaults to None.
+            requirements (list, optional): List of packages to install in the sandbox. Defaults to None.
+            network_mode (str, optional): Network mode to use for the sandbox. Defaults to "none".
+            config (str, optional): Ready-made specs configuration for the sandbox. Defaults to "small".
+        """
+        if count <= 0:
+            return
+
+        key = self._pool_key(coding_language, custom_image_name, requirements, network_mode, config)
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            sandboxes = list(executor.map(lambda _: self._create_sandbox(key), range(count)))
+
+        self._add_idle(key, sandboxes)
+
+    def close(self):
+        """
+        Close all idle sandboxes in the pool.
+
+        Sandboxes still checked out are left to their callers.
+        """
+        with self._lock:
+            sandboxes = [sandbox for idle in self._idle.values() for sandbox in idle]
+            self._idle.clear()
+
+        for sandbox in sandboxes:
+            sandbox.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
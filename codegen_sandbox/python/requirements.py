@@ -1,5 +1,7 @@
 compliance_script = """
-import multiprocessing
+import functools
+import json
+import sys
 import typing
 from importlib.metadata import version, PackageNotFoundError
 from packaging.requirements import Requirement
@@ -16,34 +18,37 @@ class SandboxRequirementsError(Exception):
         super().__init__(message)
 
 
+@functools.lru_cache(maxsize=None)
+def _parse_requirement(package: str) -> Requirement:
+    return Requirement(package)
+
+
 def _single_compliance(package: str) -> typing.Optional[str]:
     package = package.strip()
 
     try:
-        requirement = Requirement(package)
+        requirement = _parse_requirement(package)
         version_ = version(requirement.name)
 
         if requirement.specifier:
             if not requirement.specifier.contains(Version(version_)):
-                return f"{{package}} (version conflict: available {{version_}})"
+                return f"{package} (version conflict: available {version_})"
 
         return None
     except PackageNotFoundError:
         return package
     except InvalidVersion:
-        return f"{{package}} (invalid version requirement)"
+        return f"{package} (invalid version requirement)"
 
 
 def compliance(requirements: typing.List[str]):
-    with multiprocessing.Pool() as starpool:
-        missing = starpool.map(_single_compliance, requirements)
-
-    missing = [package for package in missing if package]
+    # metadata lookups are cheap, a process pool would cost more than the lookups
+    missing = [package for package in map(_single_compliance, requirements) if package]
     
     if missing:
         raise SandboxRequirementsError(missing)
 
     
 if __name__ == "__main__":
-    compliance({requirements})
+    compliance(json.load(sys.stdin))
 """
@@ -1,26 +1,38 @@
-import textwrap
+import shlex
 import typing
 
 from codegen_sandbox.sandbox import BaseCodegenSandbox
 from codegen_sandbox.python.requirements import compliance_script
+from codegen_sandbox.python.worker import worker_script
 
 
 class PythonCodegenSandbox(BaseCodegenSandbox):
     """Sandbox environment for executing Python code safely."""
+    _compliance_path = "/opt/codegen-sandbox/compliance.py"
+
     def _init_image_config(self):
         self._base_image_name = "python:3.9-slim"
         self._coding_language = "python"
     
     def _custom_image_dockerfile(self, image_name: str) -> str:
-        return f"FROM {image_name}\nRUN pip install {' '.join(self.requirements + ['packaging'])}"
-    
-    def _compliance_script(self, requirements: typing.List[str]) -> str:
-        return compliance_script.format(requirements=requirements)
+        # stable layers first, so that the build cache is reused across requirements
+        requirements = " ".join(shlex.quote(package) for package in sorted(set(self.requirements)))
+
+        return (
+            f"FROM {image_name}\n"
+            f"WORKDIR {self._workdir}\n"
+            "RUN pip install --no-cache-dir 'packaging>=21'\n"
+            f"RUN pip install --no-cache-dir {requirements}\n"
+        )
     
-    def _prepare_code_command(self, code: str) -> str:
-        code = textwrap.dedent(code)
+    def _compliance_script(self) -> str:
+        return compliance_script
 
-        escaped_code = code.replace("'", "'\"'\"'")
-        exec_command = f"python -c '{escaped_code}'"
+    def _compliance_command(self) -> typing.List[str]:
+        return ["python", self._compliance_path]
+    
+    def _prepare_code_command(self) -> typing.List[str]:
+        return ["python", "-"]
 
-        return exec_command
+    def _worker_command(self) -> typing.List[str]:
+        return ["python", "-u", "-c", worker_script]
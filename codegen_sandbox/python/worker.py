@@ -0,0 +1,192 @@
+worker_script = r"""
+import json
+import os
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+
+
+def _read_exactly(stream, size):
+    data = b""
+
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+
+        if not chunk:
+            raise EOFError
+
+        data += chunk
+
+    return data
+
+
+def _exit_code(returncode):
+    # processes killed by a signal report as a shell would
+    return returncode if returncode >= 0 else 128 - returncode
+
+
+def _run(request):
+    env = dict(os.environ, **request["env"])
+
+    try:
+        # the code runs in its own session, so that a timeout reaches all of its descendants
+        process = subprocess.Popen(
+            request["command"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            start_new_session=True
+        )
+    except OSError as e:
+        return {"exit_code": 127, "stdout": "", "stderr": str(e)}
+
+    try:
+        stdout, stderr = process.communicate(request["stdin"].encode("utf-8"), timeout=request["timeout"])
+        exit_code = _exit_code(process.returncode)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        stdout, stderr = process.communicate()
+        exit_code = 124
+
+    return {
+        "exit_code": exit_code,
+        "stdout": stdout.decode("utf-8", "replace"),
+        "stderr": stderr.decode("utf-8", "replace")
+    }
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def _delete_file(request):
+    try:
+        os.remove(request["path"])
+    except FileNotFoundError:
+        pass
+
+    return {}
+
+
+def _write_dir(request):
+    os.makedirs(request["path"], exist_ok=True)
+    return {}
+
+
+def _delete_dir(request):
+    _remove(request["path"])
+    return {}
+
+
+def _isdir(request):
+    return {"isdir": os.path.isdir(request["path"])}
+
+
+def _parents():
+    parents = {}
+
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+
+        try:
+            with open("/proc/{}/stat".format(entry)) as file:
+                state, ppid = file.read().rsplit(")", 1)[1].split()[:2]
+        except (OSError, ValueError):
+            continue
+
+        if state != "Z":
+            parents[int(entry)] = int(ppid)
+
+    return parents
+
+
+def _kill_all(select):
+    # processes may fork while being killed, hence a few rounds
+    for _ in range(8):
+        pids = [pid for pid in _parents() if select(pid)]
+
+        if not pids:
+            return
+
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+def _kill_strays():
+    # init, its first child (the keepalive, started before any code could run) and the worker survive
+    parents = _parents()
+    keep = {1, os.getpid(), min((pid for pid, ppid in parents.items() if ppid == 1), default=1)}
+
+    _kill_all(lambda pid: pid not in keep)
+
+
+def _environ(pid):
+    try:
+        with open("/proc/{}/environ".format(pid), "rb") as file:
+            return file.read().split(b"\0")
+    except OSError:
+        return []
+
+
+def _kill(request):
+    # the variable is inherited, so that the descendants of the process are killed too
+    marker = request["marker"].encode("utf-8")
+    _kill_all(lambda pid: marker in _environ(pid))
+    return {}
+
+
+def _reset(request):
+    _kill_strays()
+
+    for directory in request["paths"]:
+        for entry in os.listdir(directory):
+            _remove(os.path.join(directory, entry))
+
+    return {}
+
+
+_operations = {
+    "run": _run,
+    "delete_file": _delete_file,
+    "write_dir": _write_dir,
+    "delete_dir": _delete_dir,
+    "isdir": _isdir,
+    "reset": _reset,
+    "kill": _kill,
+}
+
+
+def main():
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+
+    while True:
+        try:
+            size, = struct.unpack(">I", _read_exactly(stdin, 4))
+        except EOFError:
+            return
+
+        request = json.loads(_read_exactly(stdin, size).decode("utf-8"))
+
+        try:
+            response = dict(_operations[request["op"]](request), ok=True)
+        except Exception as e:
+            response = {"ok": False, "error": "{}: {}".format(type(e).__name__, e)}
+
+        payload = json.dumps(response).encode("utf-8")
+
+        stdout.write(struct.pack(">I", len(payload)) + payload)
+        stdout.flush()
+
+
+main()
+"""
@@ -1,20 +1,161 @@
+import asyncio
+import codecs
+import functools
+import hashlib
 import io
+import json
 import os
-import shlex
+import posixpath
+import socket
+import struct
 import tarfile
-import time
+import tempfile
+import textwrap
+import threading
 import typing
 import uuid
+import weakref
 from abc import ABC, abstractmethod
 from typing import Any
 
 import docker
+import docker.errors
 import docker.models.containers
 import docker.models.images
+import docker.utils.socket
 
 from codegen_sandbox.config import SandboxConfig, available, readymade
 from codegen_sandbox.error import SandboxError, SandboxConfigError
 from codegen_sandbox.model import SandboxResponse
+from codegen_sandbox.worker import SandboxWorker
+
+
+_client: typing.Optional[docker.DockerClient] = None
+_client_lock = threading.Lock()
+
+# concurrent sandboxes, e.g., prewarmed by a pool, each hold a connection to the daemon
+_client_max_pool_size = 64
+
+_free_cpus: typing.Optional[typing.Set[int]] = None
+_free_cpus_lock = threading.Lock()
+
+# archives larger than this are written to a temporary file rather than kept in memory
+_archive_spool_size = 4 * 1024 * 1024
+# archives smaller than this are formatted by hand, skipping the tarfile machinery
+_ustar_max_size = 1024 * 1024
+
+# requirements images are tagged by the hash of their Dockerfile and kept across sandboxes, up to a bound
+_image_repository = "codegen-sandbox"
+
+
+def get_client() -> docker.DockerClient:
+    """
+    Get the Docker client shared by all sandboxes.
+
+    The client is created on first use, so that sandboxes share one connection pool
+    and load the Docker configuration only once. The pool is sized for many concurrent
+    sandboxes, so that connections are kept alive rather than churned.
+
+    Returns:
+        docker.DockerClient: Shared Docker client.
+    """
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = docker.from_env(max_pool_size=_client_max_pool_size)
+
+    return _client
+
+
+def _ustar_archive(files: typing.Dict[str, bytes]) -> typing.Optional[bytes]:
+    """Format an archive of regular files as plain ustar, or None if a name does not fit"""
+    blocks = []
+
+    for name, data in files.items():
+        name = name.encode("utf-8")
+
+        if len(name) > 100:
+            return None
+
+        header = struct.pack(
+            "100s8s8s8s12s12s8sc100s6s2s32s32s8s8s155s12x",
+            name, b"0000644\0", b"0000000\0", b"0000000\0", b"%011o\0" % len(data), b"%011o\0" % 0,
+            b" " * 8, b"0", b"", b"ustar\0", b"00", b"", b"", b"", b"", b""
+        )
+        # the checksum is computed with its own field set to spaces
+        header = header[:148] + b"%06o\0 " % sum(header) + header[156:]
+
+        blocks += [header, data, b"\0" * (-len(data) % 512)]
+
+    blocks.append(b"\0" * 1024)
+
+    return b"".join(blocks)
+
+
+def _allocate_cpus(count: int) -> typing.Optional[typing.List[int]]:
+    """Take host CPUs for the exclusive use of a sandbox, or None if not enough are free"""
+    global _free_cpus
+
+    with _free_cpus_lock:
+        if _free_cpus is None:
+            _free_cpus = set(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else set(range(os.cpu_count()))
+
+        if len(_free_cpus) < count:
+            return None
+
+        cpus = sorted(_free_cpus)[:count]
+        _free_cpus.difference_update(cpus)
+
+    return cpus
+
+
+def _release_cpus(cpus: typing.List[int]):
+    """Give back host CPUs taken by a sandbox"""
+    with _free_cpus_lock:
+        _free_cpus.update(cpus)
+
+
+def _cleanup(client: docker.DockerClient, container_id: str, cpus: typing.Optional[typing.List[int]]):
+    """Best-effort removal of the container of a sandbox that was never closed"""
+    try:
+        client.api.remove_container(container_id, force=True)
+    except Exception:
+        pass
+
+    if cpus:
+        _release_cpus(cpus)
+
+
+def prune_image_cache(max_images: int = 0, client: typing.Optional[docker.DockerClient] = None) -> typing.List[str]:
+    """
+    Remove the cached requirements images, oldest first.
+
+    Images still in use by a container are skipped.
+
+    Args:
+        max_images (int, optional): Number of most recent images to keep. Defaults to 0, i.e., remove all.
+        client (docker.DockerClient, optional): Docker client to use. Defaults to None, i.e., the shared client.
+
+    Returns:
+        list: Tags of the removed images.
+    """
+    client = client or get_client()
+
+    images = client.images.list(name=_image_repository)
+    images.sort(key=lambda image: image.attrs["Created"], reverse=True)
+
+    removed = []
+
+    for image in images[max_images:]:
+        try:
+            client.images.remove(image.id)
+        except docker.errors.APIError:
+            continue
+
+        removed.extend(image.tags)
+
+    return removed
 
 
 class BaseCodegenSandbox(ABC):
@@ -25,29 +166,44 @@ class BaseCodegenSandbox(ABC):
     additional requirements, and provides methods to execute code, read, write 
     and delete files, and write and delete directories within the sandbox.
 
+    Sandboxes should be used as context managers or closed explicitly; otherwise, their
+    resources are only removed on a best-effort basis when garbage collected.
+
     Attributes:
         client (docker.DockerClient): Docker client for managing containers and images.
         config (SandboxConfig): Specs configuration for the sandbox.
         container (docker.models.containers.Container): The Docker container used as a sandbox.
         requirements (list): List of packages to install in the sandbox.
-        temp_image (docker.models.images.Image): Temporary Docker image created for the sandbox.
+        env_vars (dict): Environment variables set for all executions.
+        image (docker.models.images.Image): Cached Docker image with the requirements of the sandbox.
         _base_image_name (str): Name of the base Docker image to use for the sandbox.
         _coding_language (str): Coding language used in the sandbox.
+        _compliance_path (str): Path of the compliance script, uploaded once to sandboxes with requirements.
+        _workdir (str): Working directory of the sandbox, where relative paths are resolved.
     """
     client: docker.DockerClient
     config: SandboxConfig
     container: docker.models.containers.Container
     requirements: typing.List[str]
-    temp_image: typing.Optional[docker.models.images.Image]
+    env_vars: typing.Dict[str, str]
+    image: typing.Optional[docker.models.images.Image]
     _base_image_name: str
     _coding_language: str
+    _compliance_path: str
+    _workdir: str = "/sandbox"
 
     def __init__(
         self, 
         custom_image_name: typing.Optional[str] = None, 
         requirements: typing.Optional[typing.List[str]] = None, 
         network_mode: str = "none", 
-        config: str = "small"
+        config: str = "small",
+        client: typing.Optional[docker.DockerClient] = None,
+        pin_cpus: bool = False,
+        env_vars: typing.Optional[typing.Dict[str, Any]] = None,
+        disable_seccomp: bool = False,
+        tmpfs_tmpdir: bool = False,
+        max_cached_images: int = 16
     ):
         """
         Initialize the sandbox.
@@ -57,6 +213,12 @@ class BaseCodegenSandbox(ABC):
             requirements (list, optional): List of packages to install in the sandbox. Defaults to None.
             network_mode (str, optional): Network mode to use for the sandbox. Defaults to "none".
             config (str, optional): Ready-made specs configuration for the sandbox. Defaults to "small".
+            client (docker.DockerClient, optional): Docker client to use. Defaults to None, i.e., the shared client.
+            pin_cpus (bool, optional): Whether to pin the sandbox to dedicated host CPUs, if enough are free. Defaults to False.
+            env_vars (dict, optional): Environment variables to set for all executions. Defaults to None.
+            disable_seccomp (bool, optional): Whether to disable the seccomp filter, trading isolation for faster system calls. Defaults to False.
+            tmpfs_tmpdir (bool, optional): Whether to mount the temporary directory in memory, within the memory limit. Defaults to False.
+            max_cached_images (int, optional): Number of most recent requirements images kept after a build. Defaults to 16.
         """
         if config not in available:
             raise SandboxConfigError(config)
@@ -64,12 +226,26 @@ class BaseCodegenSandbox(ABC):
         self._init_image_config()
 
         self.container = None
-        self.temp_image = None
+        self.image = None
         self.requirements = requirements or []
-        self.client = docker.from_env()
+        self.env_vars = {key: str(value) for key, value in (env_vars or {}).items()}
+        self.client = client or get_client()
         self.config = readymade[config]
 
-        self._setup_sandbox(custom_image_name, network_mode)
+        self._closed = False
+        self._paused = False
+        self._finalizer = None
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._cpus = _allocate_cpus(self.config.cpus) if pin_cpus else None
+
+        try:
+            self._setup_sandbox(custom_image_name, network_mode, disable_seccomp, tmpfs_tmpdir, max_cached_images)
+        except Exception:
+            self.close()
+            raise
+
+        self._finalizer = weakref.finalize(self, _cleanup, self.client, self.container.id, self._cpus)
 
     @abstractmethod
     def _init_image_config(self):
@@ -82,36 +258,105 @@ class BaseCodegenSandbox(ABC):
         ...
 
     @abstractmethod
-    def _compliance_script(self, requirements: typing.List[str]) -> str:
-        """Generate the script to check for compliance of package requirements"""
+    def _compliance_script(self) -> str:
+        """Generate the script to check for compliance of the package requirements read from stdin"""
+        ...
+
+    @abstractmethod
+    def _compliance_command(self) -> typing.List[str]:
+        """Prepare the command to execute the uploaded compliance script"""
+        ...
+
+    @abstractmethod
+    def _prepare_code_command(self) -> typing.List[str]:
+        """Prepare the command to execute the code read from stdin"""
         ...
 
     @abstractmethod
-    def _prepare_code_command(self, code: str) -> str:
-        """Prepare the shell command to execute the code"""
+    def _worker_command(self) -> typing.List[str]:
+        """Prepare the command to start the persistent worker process"""
         ...
 
-    def _setup_sandbox(self, custom_image_name: typing.Optional[str], network_mode: str):
+    def _worker_request(self, op: str, **arguments: Any) -> typing.Dict[str, Any]:
+        """Send a request to the persistent worker, starting it if needed"""
+        # a frozen worker never answers, so the request would otherwise hang forever
+        if self._paused:
+            raise SandboxError("sandbox is paused")
+
+        # concurrent requests must not each start a worker, leaking all but the last one
+        with self._worker_lock:
+            if self._worker is None or not self._worker.alive:
+                try:
+                    self._worker = SandboxWorker(self.client, self.container.id, self._worker_command())
+                except Exception as e:
+                    raise SandboxError(f"Failed to start sandbox worker: {str(e)}")
+
+            worker = self._worker
+
+        return worker.request({"op": op, **arguments})
+
+    def _setup_sandbox(
+        self,
+        custom_image_name: typing.Optional[str],
+        network_mode: str,
+        disable_seccomp: bool,
+        tmpfs_tmpdir: bool,
+        max_cached_images: int
+    ):
         """Set up the sandbox environment."""
         image_name = custom_image_name or self._base_image_name
-        
+        built = False
+
         if self.requirements:
-            dockerfile = self._custom_image_dockerfile(image_name)
-            dockerfile_obj = io.BytesIO(dockerfile.encode('utf-8'))
-            self.temp_image = self.client.images.build(fileobj=dockerfile_obj, rm=True)[0]
-            image_name = self.temp_image.id
+            dockerfile = self._custom_image_dockerfile(image_name).encode('utf-8')
+            tag = f"{_image_repository}:{hashlib.sha256(dockerfile).hexdigest()[:16]}"
+
+            try:
+                self.image = self.client.images.get(tag)
+            except docker.errors.ImageNotFound:
+                self.image = self.client.images.build(
+                    fileobj=io.BytesIO(dockerfile),
+                    tag=tag,
+                    rm=True,
+                    pull=False
+                )[0]
+                built = True
+
+            image_name = self.image.id
 
         self.container = self.client.containers.run(
             image_name,
             name=f"{self._coding_language}-sandbox-{uuid.uuid4().hex[:8]}",
             command="tail -f /dev/null",
+            # a minimal init as PID 1 reaps the processes spawned by the worker and forwards signals
+            init=True,
             detach=True,
+            working_dir=self._workdir,
+            environment=self.env_vars,
             network_mode=network_mode,
             mem_limit=self.config.mem_limit,
+            # no swap on top of the memory limit, so that memory pressure fails fast instead of thrashing
+            memswap_limit=self.config.mem_limit,
             cpu_period=100000,
-            cpu_quota=self.config.cpu_quota
+            cpu_quota=self.config.cpu_quota,
+            cpuset_cpus=",".join(map(str, self._cpus)) if self._cpus else None,
+            security_opt=["seccomp=unconfined"] if disable_seccomp else None,
+            # the archive endpoints cannot see tmpfs mounts, hence the working directory stays on disk;
+            # docker defaults tmpfs mounts to noexec, while code may run what it extracts to /tmp
+            tmpfs={"/tmp": f"rw,exec,nosuid,size={self.config.mem_limit}"} if tmpfs_tmpdir else None
         )
 
+        if built:
+            # pruned once the container runs, so that its own image counts as in use and is kept
+            try:
+                prune_image_cache(max_cached_images, self.client)
+            except docker.errors.APIError:
+                pass
+
+        if self.requirements:
+            # uploaded once outside of the working directory, so that each check only sends the requirements
+            self.write_files({self._compliance_path: self._compliance_script()})
+
     def write_file(self, filename: str, content: Any):
         """
         Write content to a file in the sandbox, creating directories if they don't exist.
@@ -123,35 +368,53 @@ class BaseCodegenSandbox(ABC):
         Raises:
             SandboxError: If writing to the file fails.
         """
-        directory = os.path.dirname(filename)
+        self.write_files({filename: content})
+
+    def write_files(self, files: typing.Dict[str, Any]):
+        """
+        Write content to many files in the sandbox at once, creating directories if they don't exist.
+
+        Args:
+            files (dict): Mapping of the names of the files to create or overwrite to their content (str or bytes).
+
+        Raises:
+            SandboxError: If writing to the files fails.
+        """
+        members = {
+            posixpath.join(self._workdir, filename): content.encode('utf-8') if isinstance(content, str) else content
+            for filename, content in files.items()
+        }
 
-        if directory:
-            self.write_dir(directory)
+        # the daemon creates any missing parent directory while extracting the archive
+        archive = None
+        size = sum(len(file_data) for file_data in members.values())
 
-        tar_stream = io.BytesIO()
+        if size < _ustar_max_size:
+            archive = _ustar_archive(members)
 
-        with tarfile.open(fileobj=tar_stream, mode='w') as tar:
-            if isinstance(content, str):
-                file_data = content.encode('utf-8')
-            else:
-                file_data = content
+        if archive is not None:
+            tar_stream = io.BytesIO(archive)
+        else:
+            # decided upfront, as requests asks for a file descriptor, which rolls a spooled file over to disk
+            tar_stream = io.BytesIO() if size < _archive_spool_size else tempfile.TemporaryFile()
 
-            tarinfo = tarfile.TarInfo(name=filename)
-            tarinfo.size = len(file_data)
-            tar.addfile(tarinfo, io.BytesIO(file_data))
+            with tarfile.open(fileobj=tar_stream, mode='w') as tar:
+                for name, file_data in members.items():
+                    tarinfo = tarfile.TarInfo(name=name)
+                    tarinfo.size = len(file_data)
+                    tar.addfile(tarinfo, io.BytesIO(file_data))
 
-        tar_stream.seek(0)
+            tar_stream.seek(0)
 
         try:
-            self.container.put_archive('/', tar_stream)
+            written = self.container.put_archive('/', tar_stream)
         except Exception as e:
-            raise SandboxError(f"Failed to write file: {str(e)}")
+            raise SandboxError(f"Failed to write files: {str(e)}")
+        finally:
+            tar_stream.close()
 
-        check_command = f'test -f {shlex.quote(filename)}'
-        check_result = self.container.exec_run(["sh", "-c", check_command])
-
-        if check_result.exit_code != 0:
-            raise SandboxError(f"Failed to write file: {filename}")
+        if not written:
+            raise SandboxError(f"Failed to write files: {', '.join(files)}")
 
     def read_file(self, filename: str):
         """
@@ -166,12 +429,39 @@ class BaseCodegenSandbox(ABC):
         Raises:
             SandboxError: If reading the file fails.
         """
-        result = self.container.exec_run(["cat", filename])
-        
-        if result.exit_code != 0:
-            raise SandboxError(f"Failed to read file: {result.output.decode('utf-8')}")
-        
-        return result.output.decode('utf-8')
+        return self.read_files([filename])[filename]
+
+    def read_files(self, filenames: typing.List[str]) -> typing.Dict[str, str]:
+        """
+        Read content from many files in the sandbox.
+
+        Args:
+            filenames (list): Names of the files to read.
+
+        Returns:
+            dict: Mapping of the names of the files to their content.
+
+        Raises:
+            SandboxError: If reading any of the files fails.
+        """
+        contents = {}
+
+        for filename in filenames:
+            # the archive endpoint streams the file without spawning a process in the container
+            try:
+                stream, _ = self.container.get_archive(posixpath.join(self._workdir, filename))
+            except Exception as e:
+                raise SandboxError(f"Failed to read file: {str(e)}")
+
+            with tarfile.open(fileobj=io.BytesIO(b"".join(stream))) as tar:
+                member = tar.next()
+
+                if member is None or not member.isfile():
+                    raise SandboxError(f"Failed to read file: {filename} is not a regular file")
+
+                contents[filename] = tar.extractfile(member).read().decode('utf-8')
+
+        return contents
     
     def delete_file(self, filename: str):
         """
@@ -183,11 +473,10 @@ class BaseCodegenSandbox(ABC):
         Raises:
             SandboxError: If deleting the file fails.
         """
-        delete_command = f'rm -f {shlex.quote(filename)}'
-        delete_result = self.container.exec_run(["sh", "-c", delete_command])
-        
-        if delete_result.exit_code != 0:
-            raise SandboxError(f"Failed to delete file: {delete_result.output.decode('utf-8')}")
+        try:
+            self._worker_request("delete_file", path=filename)
+        except SandboxError as e:
+            raise SandboxError(f"Failed to delete file: {str(e)}")
 
     def write_dir(self, directory: str):
         """
@@ -199,11 +488,10 @@ class BaseCodegenSandbox(ABC):
         Raises:
             SandboxError: If creating the directory fails.
         """
-        mkdir_command = f'mkdir -p {shlex.quote(directory)}'
-        mkdir_result = self.container.exec_run(["sh", "-c", mkdir_command])
-        
-        if mkdir_result.exit_code != 0:
-            raise SandboxError(f"Failed to create directory: {mkdir_result.output.decode('utf-8')}")
+        try:
+            self._worker_request("write_dir", path=directory)
+        except SandboxError as e:
+            raise SandboxError(f"Failed to create directory: {str(e)}")
         
     def delete_dir(self, directory: str):
         """
@@ -215,12 +503,45 @@ class BaseCodegenSandbox(ABC):
         Raises:
             SandboxError: If deleting the directory fails.
         """
-        rmdir_command = f'rm -rf {shlex.quote(directory)}'
-        rmdir_result = self.container.exec_run(["sh", "-c", rmdir_command])
-        
-        if rmdir_result.exit_code != 0:
-            raise SandboxError(f"Failed to delete directory: {rmdir_result.output.decode('utf-8')}")
-    
+        try:
+            self._worker_request("delete_dir", path=directory)
+        except SandboxError as e:
+            raise SandboxError(f"Failed to delete directory: {str(e)}")
+
+    def isdir(self, directory: str) -> bool:
+        """
+        Check if a directory exists in the sandbox.
+
+        Args:
+            directory (str): Path of the directory to check.
+
+        Returns:
+            bool: Whether the directory exists.
+
+        Raises:
+            SandboxError: If checking the directory fails.
+        """
+        try:
+            return self._worker_request("isdir", path=directory)["isdir"]
+        except SandboxError as e:
+            raise SandboxError(f"Failed to check directory: {str(e)}")
+
+    def reset(self):
+        """
+        Reset the sandbox to a clean state, so that it can be reused.
+
+        Processes left behind by previous runs are killed, and the content of the working
+        directory and of the temporary directory is deleted, while the installed requirements
+        are preserved.
+
+        Raises:
+            SandboxError: If cleaning the sandbox fails.
+        """
+        try:
+            self._worker_request("reset", paths=[self._workdir, "/tmp"])
+        except SandboxError as e:
+            raise SandboxError(f"Failed to reset sandbox: {str(e)}")
+
     def run_requirements_compliance(self, requirements: typing.List[str]) -> SandboxResponse:
         """
         Check if the specified packages are available in the sandbox.
@@ -234,8 +555,7 @@ class BaseCodegenSandbox(ABC):
         if not self.requirements:
             return SandboxResponse(stdout="", stderr="SandboxRequirementsError: requirements-free sandbox")
 
-        output = self.run_code(self._compliance_script(requirements=requirements))
-        return output
+        return self._run(self._compliance_command(), json.dumps(list(requirements)), {}, None)
 
     def run_code(
         self,
@@ -248,7 +568,7 @@ class BaseCodegenSandbox(ABC):
 
         Args:
             code (str): Code to execute.
-            env_vars (dict, optional): Environment variables to set for the execution. Defaults to None.
+            env_vars (dict, optional): Environment variables to set for the execution, on top of those of the sandbox. Defaults to None.
             timeout (int, optional): Execution timeout in seconds. Defaults to None, i.e., disabled.
 
         Returns:
@@ -256,65 +576,213 @@ class BaseCodegenSandbox(ABC):
         """
         if env_vars is None:
             env_vars = {}
-        
-        exec_command = self._prepare_code_command(code)
 
-        if timeout:
-            exec_command = f"timeout {timeout}s {exec_command}"
-        
-        exec_result = self.container.exec_run(
-            ["sh", "-c", exec_command],
-            demux=True,
-            environment=env_vars
+        return self._run(self._prepare_code_command(), textwrap.dedent(code), env_vars, timeout)
+
+    def _run(
+        self,
+        command: typing.List[str],
+        stdin: str,
+        env_vars: typing.Dict[str, Any],
+        timeout: typing.Optional[int]
+    ) -> SandboxResponse:
+        """Run a command through the persistent worker, sparing a new exec through the daemon"""
+        response = self._worker_request(
+            "run",
+            command=command,
+            stdin=stdin,
+            env={key: str(value) for key, value in env_vars.items()},
+            # a zero timeout disables it, as in run_code_stream
+            timeout=timeout or None
         )
-        
-        status = exec_result.exit_code
-        stdout, stderr = exec_result.output
 
-        stdout = stdout.decode("utf-8") if stdout else ""
-        stderr = stderr.decode("utf-8") if stderr else ""
+        status = response["exit_code"]
+        stdout = response["stdout"]
+        stderr = response["stderr"]
 
         if status != 0:
             stderr = f"(exit code {status})" + stderr
 
         return SandboxResponse(stdout=stdout, stderr=stderr)
 
+    def run_code_stream(
+        self,
+        code: str,
+        env_vars: typing.Optional[typing.Dict[str, Any]] = None,
+        timeout: typing.Optional[int] = None
+    ) -> typing.Iterator[typing.Tuple[str, str]]:
+        """
+        Execute code in the sandbox, yielding its output as it is produced.
+
+        The code runs in its own exec rather than through the persistent worker, so that its
+        output is forwarded as soon as the daemon receives it instead of once the code exits.
+        If the caller stops iterating early, e.g., by closing the generator, the code and its
+        descendants are killed.
+
+        Args:
+            code (str): Code to execute.
+            env_vars (dict, optional): Environment variables to set for the execution, on top of those of the sandbox. Defaults to None.
+            timeout (int, optional): Execution timeout in seconds. Defaults to None, i.e., disabled.
+
+        Yields:
+            tuple: Chunk of output (stdout) and of error messages (stderr), one of which is empty.
+                A non-zero exit code is reported as a last "(exit code N)" chunk of error messages.
+        """
+        if self._paused:
+            raise SandboxError("sandbox is paused")
+
+        if env_vars is None:
+            env_vars = {}
+
+        exec_command = self._prepare_code_command()
+
+        if timeout:
+            exec_command = ["timeout", f"{timeout}s", *exec_command]
+
+        # tags the processes of the execution, whose PIDs in the container the daemon does not report
+        stream_id = uuid.uuid4().hex
+
+        exec_id = self.client.api.exec_create(
+            self.container.id,
+            exec_command,
+            stdin=True,
+            environment={
+                **{key: str(value) for key, value in env_vars.items()},
+                "CODEGEN_SANDBOX_STREAM": stream_id
+            }
+        )["Id"]
+
+        exec_socket = self.client.api.exec_start(exec_id, socket=True)
+
+        # chunks may split multi-byte characters, which the decoders carry over to the next chunk
+        decoders = {
+            docker.utils.socket.STDOUT: codecs.getincrementaldecoder("utf-8")("replace"),
+            docker.utils.socket.STDERR: codecs.getincrementaldecoder("utf-8")("replace")
+        }
+
+        finished = False
+
+        try:
+            raw_socket = getattr(exec_socket, "_sock", exec_socket)
+            raw_socket.sendall(textwrap.dedent(code).encode("utf-8"))
+            raw_socket.shutdown(socket.SHUT_WR)
+
+            for stream, chunk in docker.utils.socket.frames_iter(exec_socket, tty=False):
+                text = decoders[stream].decode(chunk)
+
+                if text:
+                    yield (text, "") if stream == docker.utils.socket.STDOUT else ("", text)
+
+            finished = True
+        finally:
+            exec_socket.close()
+
+            if not finished:
+                try:
+                    self._worker_request("kill", marker=f"CODEGEN_SANDBOX_STREAM={stream_id}")
+                except SandboxError:
+                    pass
+
+        status = self.client.api.exec_inspect(exec_id)["ExitCode"]
+
+        if status != 0:
+            yield "", f"(exit code {status})"
+
+    async def run_code_async(
+        self,
+        code: str,
+        env_vars: typing.Optional[typing.Dict[str, Any]] = None,
+        timeout: typing.Optional[int] = None
+    ) -> SandboxResponse:
+        """
+        Execute code in the sandbox without blocking the event loop.
+
+        Runs of different sandboxes overlap, while runs of the same sandbox are executed one at a time.
+
+        Args:
+            code (str): Code to execute.
+            env_vars (dict, optional): Environment variables to set for the execution. Defaults to None.
+            timeout (int, optional): Execution timeout in seconds. Defaults to None, i.e., disabled.
+
+        Returns:
+            SandboxResponse: Output (stdout) and error messages (stderr) of the executed code.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.run_code, code, env_vars, timeout))
+
+    def pause(self):
+        """
+        Freeze all processes in the sandbox, keeping its state, until it is resumed.
+
+        A paused sandbox costs no CPU time and is resumed much faster than a new one is started.
+
+        Raises:
+            SandboxError: If pausing the sandbox fails.
+        """
+        if self._paused:
+            return
+
+        try:
+            self.container.pause()
+        except Exception as e:
+            raise SandboxError(f"Failed to pause sandbox: {str(e)}")
+
+        self._paused = True
+
+    def resume(self):
+        """
+        Resume a paused sandbox.
+
+        Raises:
+            SandboxError: If resuming the sandbox fails.
+        """
+        if not self._paused:
+            return
+
+        try:
+            self.container.unpause()
+        except Exception as e:
+            raise SandboxError(f"Failed to resume sandbox: {str(e)}")
+
+        self._paused = False
+
     def close(self):
         """
         Remove all resources created by this sandbox.
 
         This method should be called when the sandbox is no longer needed to clean up Docker resources.
+        The cached requirements image is kept for later sandboxes, see `prune_image_cache`.
         """
+        if self._closed:
+            return
+
+        self._closed = True
+
+        if self._finalizer is not None:
+            self._finalizer.detach()
+
+        if self._worker is not None:
+            self._worker.close()
+            self._worker = None
+
+        if self.container and self._paused:
+            try:
+                self.container.unpause()
+            except Exception:
+                pass
+
         if self.container:
             try:
-                self.container.stop(timeout=10)
+                # killed at once, a graceful stop would only wait on the keepalive process
                 self.container.remove(force=True)
             except Exception as e:
                 print(f"Error stopping/removing container: {str(e)}")
             finally:
                 self.container = None
 
-        time.sleep(2)
-
-        if self.temp_image:
-            try:
-                for _ in range(3):
-                    try:
-                        self.client.images.remove(self.temp_image.id, force=True)
-                        break
-                    except Exception as e:
-                        print(f"Attempt to remove image failed: {str(e)}")
-                        time.sleep(2)
-                else:
-                    print("Failed to remove temporary image after multiple attempts")
-            except Exception as e:
-                print(f"Error removing temporary image: {str(e)}")
-            finally:
-                self.temp_image = None
-
-    def __del__(self):
-        """Ensure resources are cleaned up when the object is garbage collected."""
-        self.close()
+        if self._cpus:
+            _release_cpus(self._cpus)
+            self._cpus = None
 
     def __enter__(self):
         return self
@@ -329,7 +797,13 @@ def init_codegen_sandbox(
     custom_image_name: typing.Optional[str] = None, 
     requirements: typing.Optional[typing.List[str]] = None, 
     network_mode: str = "none", 
-    config: str = "small"
+    config: str = "small",
+    client: typing.Optional[docker.DockerClient] = None,
+    pin_cpus: bool = False,
+    env_vars: typing.Optional[typing.Dict[str, Any]] = None,
+    disable_seccomp: bool = False,
+    tmpfs_tmpdir: bool = False,
+    max_cached_images: int = 16
 ) -> BaseCodegenSandbox:
     """
     Initialize the sandbox for a given coding language.
@@ -340,6 +814,12 @@ def init_codegen_sandbox(
         requirements (list, optional): List of packages to install in the sandbox. Defaults to None.
         network_mode (str, optional): Network mode to use for the sandbox. Defaults to "none".
         config (str, optional): Ready-made specs configuration for the sandbox. Defaults to "small".
+        client (docker.DockerClient, optional): Docker client to use. Defaults to None, i.e., the shared client.
+        pin_cpus (bool, optional): Whether to pin the sandbox to dedicated host CPUs, if enough are free. Defaults to False.
+        env_vars (dict, optional): Environment variables to set for all executions. Defaults to None.
+        disable_seccomp (bool, optional): Whether to disable the seccomp filter, trading isolation for faster system calls. Defaults to False.
+        tmpfs_tmpdir (bool, optional): Whether to mount the temporary directory in memory, within the memory limit. Defaults to False.
+        max_cached_images (int, optional): Number of most recent requirements images kept after a build. Defaults to 16.
 
     Returns:
         BaseCodegenSandbox: Instance of the codegen sandbox
@@ -352,7 +832,13 @@ def init_codegen_sandbox(
             custom_image_name=custom_image_name,
             requirements=requirements,
             network_mode=network_mode,
-            config=config
+            config=config,
+            client=client,
+            pin_cpus=pin_cpus,
+            env_vars=env_vars,
+            disable_seccomp=disable_seccomp,
+            tmpfs_tmpdir=tmpfs_tmpdir,
+            max_cached_images=max_cached_images
         )
     elif coding_language == "node":
         from codegen_sandbox.node.sandbox import NodejsCodegenSandbox
@@ -362,7 +848,13 @@ def init_codegen_sandbox(
             custom_image_name=custom_image_name,
             requirements=requirements,
             network_mode=network_mode,
-            config=config
+            config=config,
+            client=client,
+            pin_cpus=pin_cpus,
+            env_vars=env_vars,
+            disable_seccomp=disable_seccomp,
+            tmpfs_tmpdir=tmpfs_tmpdir,
+            max_cached_images=max_cached_images
         )
     
     raise ValueError(f"unsupported coding language: {coding_language}")
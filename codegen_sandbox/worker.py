@@ -0,0 +1,112 @@
+"""module that talks to the persistent worker process running inside a sandbox"""
+
+import json
+import struct
+import threading
+import typing
+
+import docker
+import docker.utils.socket
+
+from codegen_sandbox.error import SandboxError
+
+
+class SandboxWorker:
+    """
+    Channel to a persistent worker process running inside a sandbox.
+
+    The worker is started once with a single exec and then serves length-prefixed JSON
+    requests over the attached stdin and stdout, so that each operation is a message
+    on an open socket rather than a new exec through the Docker daemon.
+
+    Attributes:
+        client (docker.DockerClient): Docker client for managing containers and images.
+        container_id (str): ID of the container running the worker.
+        command (list): Command starting the worker process.
+    """
+    client: docker.DockerClient
+    container_id: str
+    command: typing.List[str]
+
+    def __init__(self, client: docker.DockerClient, container_id: str, command: typing.List[str]):
+        """
+        Start the worker.
+
+        Args:
+            client (docker.DockerClient): Docker client for managing containers and images.
+            container_id (str): ID of the container running the worker.
+            command (list): Command starting the worker process.
+        """
+        self.client = client
+        self.container_id = container_id
+        self.command = command
+
+        exec_id = self.client.api.exec_create(self.container_id, self.command, stdin=True)["Id"]
+
+        self._socket = self.client.api.exec_start(exec_id, socket=True)
+        self._raw_socket = getattr(self._socket, "_sock", self._socket)
+        self._frames = docker.utils.socket.frames_iter(self._socket, tty=False)
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+
+    def _read_exactly(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            stream, chunk = next(self._frames, (None, None))
+
+            if chunk is None:
+                raise EOFError("worker exited")
+
+            if stream == docker.utils.socket.STDOUT:
+                self._buffer += chunk
+
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+
+        return data
+
+    def request(self, request: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        """
+        Send a request to the worker and wait for its response.
+
+        Args:
+            request (dict): Request with the operation ("op") and its arguments.
+
+        Returns:
+            dict: Response of the worker.
+
+        Raises:
+            SandboxError: If the worker fails the operation or cannot be reached.
+        """
+        payload = json.dumps(request).encode("utf-8")
+
+        with self._lock:
+            try:
+                self._raw_socket.sendall(struct.pack(">I", len(payload)) + payload)
+
+                size, = struct.unpack(">I", self._read_exactly(4))
+                response = json.loads(self._read_exactly(size).decode("utf-8"))
+            except (OSError, EOFError) as e:
+                self.close()
+                raise SandboxError(f"Sandbox worker unavailable: {str(e)}")
+
+        if not response.pop("ok"):
+            raise SandboxError(response["error"])
+
+        return response
+
+    @property
+    def alive(self) -> bool:
+        """Whether the channel to the worker is still open"""
+        return self._socket is not None
+
+    def close(self):
+        """Close the channel, which terminates the worker."""
+        if self._socket is not None:
+            try:
+                self._socket.close()
+                self._raw_socket.close()
+            except Exception:
+                pass
+            finally:
+                self._socket = None
+                self._raw_socket = None
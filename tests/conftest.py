@@ -0,0 +1,28 @@
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from codegen_sandbox import CodegenSandboxPool
+
+
+@pytest.fixture(scope="session")
+def sandbox_pool():
+    with CodegenSandboxPool() as pool:
+        yield pool
+
+
+@pytest.fixture(scope="session")
+def prewarm(sandbox_pool: CodegenSandboxPool):
+    def prewarm(coding_language: str, requirements: typing.List[str]):
+        # the sandboxes with and without requirements start in parallel rather than on the first tests using them
+        with ThreadPoolExecutor() as executor:
+            futures = [
+                executor.submit(sandbox_pool.prewarm, 2, coding_language),
+                executor.submit(sandbox_pool.prewarm, 1, coding_language, requirements=requirements)
+            ]
+
+        for future in futures:
+            future.result()
+
+    return prewarm
@@ -1,137 +1,140 @@
-from codegen_sandbox import init_codegen_sandbox
-
-
-def test_sandbox():
-    with init_codegen_sandbox("node") as sandbox:
-        code = """
-        console.log("hello, I'm a sandbox");
-        """
-        
-        output = sandbox.run_code(code)
-
-        assert "hello, I'm a sandbox" in output.stdout
-        assert output.stderr == ""
-
-
-def test_sandbox_with_environment():
-    sandbox = init_codegen_sandbox("node")
-    
-    try:
-        code = """
-        console.log(process.env.example);
-        """
-        
-        output = sandbox.run_code(code, env_vars={"example": "1"})
-
-        assert "1" in output.stdout
-        assert output.stderr == ""
-    finally:
-        sandbox.close()
-
-
-def test_sandbox_with_requirements():
-    sandbox = init_codegen_sandbox("node", requirements=["axios@^1.0.0"])
-    
-    try:
-        code = """
-        const axios = require('axios');
-        """
-        
-        output = sandbox.run_code(code)
-        
-        assert output.stdout == ""
-        assert output.stderr == ""
-    finally:
-        sandbox.close()
-
-
-def test_sandbox_with_requirements_compliance():
-    with init_codegen_sandbox("node", requirements=["axios@^1.0.0"]) as sandbox:
-        output = sandbox.run_requirements_compliance(["axios@^1.0.0"])
-
-        assert output.stdout == ""
-        assert output.stderr == ""
-
-
-def test_sandbox_free_requirements_compliance():
-    with init_codegen_sandbox("node") as sandbox:
-        output = sandbox.run_requirements_compliance(["axios@^1.0.0"])
-
-        assert output.stdout == ""
-        assert output.stderr == "SandboxRequirementsError: requirements-free sandbox"
-
-
-def test_sandbox_with_timeout():
-    sandbox = init_codegen_sandbox("node")
-    
-    try:
-        code = """
-        setTimeout(() => {
-            console.log('timeout');
-        }, 10000);
-        """
-        
-        output = sandbox.run_code(code, timeout=5)
-
-        assert output.stdout == ""
-        assert "exit code 124" in output.stderr
-    finally:
-        sandbox.close()
-
-
-def test_sandbox_without_environment():
-    sandbox = init_codegen_sandbox("node")
-    
-    try:
-        code = """
-        console.log(process.env.example);
-        """
-        
-        output = sandbox.run_code(code)
-
-        assert "undefined" in output.stdout
-        assert output.stderr == ""
-    finally:
-        sandbox.close()
-
-
-def test_sandbox_without_requirements():
-    sandbox = init_codegen_sandbox("node")
-    
-    try:
-        code = """
-        const axios = require('axios');
-        """
-        
-        output = sandbox.run_code(code)
-
-        assert output.stdout == ""
-        assert "Cannot find module 'axios'" in output.stderr
-    finally:
-        sandbox.close()
-
-
-def test_sandbox_without_requirements_compliance():
-    with init_codegen_sandbox("node", requirements=["axios@^1.0.0"]) as sandbox:
-        output = sandbox.run_requirements_compliance(["express", "lodash"])
-
-        assert output.stdout == ""
-        assert "SandboxRequirementsError" in output.stderr
-
-
-def test_sandbox_without_timeout():
-    sandbox = init_codegen_sandbox("node")
-    
-    try:
-        code = """
-        setTimeout(() => {
-            console.log('timeout');
-        }, 10000);
-        """
-        
-        output = sandbox.run_code(code)
-
-        assert "timeout" in output.stdout
-        assert output.stderr == ""
-    finally:
-        sandbox.close()
+import pytest
+
+from codegen_sandbox import BaseCodegenSandbox, CodegenSandboxPool, SandboxError
+
+
+@pytest.fixture(scope="module", autouse=True)
+def prewarmed(prewarm):
+    prewarm("node", ["axios@^1.0.0"])
+
+
+@pytest.fixture(scope="function")
+def sandbox(sandbox_pool: CodegenSandboxPool):
+    sandbox = sandbox_pool.get_sandbox("node")
+    yield sandbox
+    sandbox_pool.release_sandbox(sandbox)
+
+
+@pytest.fixture(scope="function")
+def sandbox_with_requirements(sandbox_pool: CodegenSandboxPool):
+    sandbox = sandbox_pool.get_sandbox("node", requirements=["axios@^1.0.0"])
+    yield sandbox
+    sandbox_pool.release_sandbox(sandbox)
+
+
+def test_sandbox(sandbox: BaseCodegenSandbox):
+    code = """
+    console.log("hello, I'm a sandbox");
+    console.log(process.env.example);
+    """
+
+    output = sandbox.run_code(code, env_vars={"example": "1"})
+
+    assert output.stdout.splitlines() == ["hello, I'm a sandbox", "1"]
+    assert output.stderr == ""
+
+
+def test_sandbox_with_requirements(sandbox_with_requirements: BaseCodegenSandbox):
+    code = """
+    const axios = require('axios');
+    """
+
+    output = sandbox_with_requirements.run_code(code)
+
+    assert output.stdout == ""
+    assert output.stderr == ""
+
+    output = sandbox_with_requirements.run_requirements_compliance(["axios@^1.0.0"])
+
+    assert output.stdout == ""
+    assert output.stderr == ""
+
+
+def test_sandbox_with_requirements_esm(sandbox_with_requirements: BaseCodegenSandbox):
+    code = """
+    import('axios').then((axios) => console.log(typeof axios.default));
+    """
+
+    output = sandbox_with_requirements.run_code(code)
+
+    assert output.stdout == "function\n"
+    assert output.stderr == ""
+
+
+def test_sandbox_files_and_dirs(sandbox: BaseCodegenSandbox):
+    sandbox.write_dir("output/nested")
+    assert sandbox.isdir("output")
+    assert sandbox.isdir("output/nested")
+
+    sandbox.write_file("output/nested/output.txt", "hello, I'm a sandbox")
+    assert not sandbox.isdir("output/nested/output.txt")
+
+    sandbox.delete_file("output/nested/output.txt")
+
+    with pytest.raises(SandboxError):
+        sandbox.read_file("output/nested/output.txt")
+
+    sandbox.delete_dir("output")
+    assert not sandbox.isdir("output")
+
+
+def test_sandbox_free_requirements_compliance(sandbox: BaseCodegenSandbox):
+    output = sandbox.run_requirements_compliance(["axios@^1.0.0"])
+
+    assert output.stdout == ""
+    assert output.stderr == "SandboxRequirementsError: requirements-free sandbox"
+
+
+def test_sandbox_with_timeout(sandbox: BaseCodegenSandbox):
+    code = """
+    setTimeout(() => {
+        console.log('timeout');
+    }, 2000);
+    """
+
+    output = sandbox.run_code(code, timeout=1)
+
+    assert output.stdout == ""
+    assert "exit code 124" in output.stderr
+
+
+def test_sandbox_without_environment(sandbox: BaseCodegenSandbox):
+    code = """
+    console.log(process.env.example);
+    """
+
+    output = sandbox.run_code(code)
+
+    assert "undefined" in output.stdout
+    assert output.stderr == ""
+
+
+def test_sandbox_without_requirements(sandbox: BaseCodegenSandbox):
+    code = """
+    const axios = require('axios');
+    """
+
+    output = sandbox.run_code(code)
+
+    assert output.stdout == ""
+    assert "Cannot find module 'axios'" in output.stderr
+
+
+def test_sandbox_without_requirements_compliance(sandbox_with_requirements: BaseCodegenSandbox):
+    output = sandbox_with_requirements.run_requirements_compliance(["express", "lodash"])
+
+    assert output.stdout == ""
+    assert "SandboxRequirementsError" in output.stderr
+
+
+def test_sandbox_without_timeout(sandbox: BaseCodegenSandbox):
+    code = """
+    setTimeout(() => {
+        console.log('timeout');
+    }, 100);
+    """
+
+    output = sandbox.run_code(code)
+
+    assert "timeout" in output.stdout
+    assert output.stderr == ""
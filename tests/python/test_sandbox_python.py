@@ -1,137 +1,242 @@
-from codegen_sandbox import init_codegen_sandbox
+import asyncio
 
+import pytest
 
-def test_sandbox():
-    with init_codegen_sandbox("python") as sandbox:
-        code = """
-        print("hello, I'm a sandbox")
-        """
-        
-        output = sandbox.run_code(code)
+from codegen_sandbox import init_codegen_sandbox, BaseCodegenSandbox, CodegenSandboxPool
 
-        assert "hello, I'm a sandbox" in output.stdout
-        assert output.stderr == ""
 
+@pytest.fixture(scope="module", autouse=True)
+def prewarmed(prewarm):
+    prewarm("python", ["requests>2"])
+
+
+@pytest.fixture(scope="function")
+def sandbox(sandbox_pool: CodegenSandboxPool):
+    sandbox = sandbox_pool.get_sandbox("python")
+    yield sandbox
+    sandbox_pool.release_sandbox(sandbox)
+
+
+@pytest.fixture(scope="function")
+def sandbox_with_requirements(sandbox_pool: CodegenSandboxPool):
+    sandbox = sandbox_pool.get_sandbox("python", requirements=["requests>2"])
+    yield sandbox
+    sandbox_pool.release_sandbox(sandbox)
+
+
+def test_sandbox(sandbox: BaseCodegenSandbox):
+    code = """
+    import os
+    print("hello, I'm a sandbox")
+    print(os.environ["example"])
+    """
+
+    output = sandbox.run_code(code, env_vars={"example": "1"})
+
+    assert output.stdout.splitlines() == ["hello, I'm a sandbox", "1"]
+    assert output.stderr == ""
+
+
+def test_sandbox_stream(sandbox: BaseCodegenSandbox):
+    code = """
+    import sys
+    print("hello, I'm a sandbox", flush=True)
+    sys.exit("goodbye")
+    """
+
+    chunks = list(sandbox.run_code_stream(code))
+
+    assert "".join(stdout for stdout, _ in chunks) == "hello, I'm a sandbox\n"
+    assert "".join(stderr for _, stderr in chunks) == "goodbye\n(exit code 1)"
+
+
+def test_sandbox_stream_close(sandbox: BaseCodegenSandbox):
+    code = """
+    import time
+    print("hello, I'm a sandbox", flush=True)
+    time.sleep(1000)
+    """
+
+    stream = sandbox.run_code_stream(code)
+
+    assert next(stream) == ("hello, I'm a sandbox\n", "")
+
+    stream.close()
+
+    code = """
+    import os
+
+    def environ(pid):
+        try:
+            with open(f"/proc/{pid}/environ", "rb") as file:
+                return file.read()
+        except OSError:
+            return b""
+
+    print(any(b"CODEGEN_SANDBOX_STREAM=" in environ(pid) for pid in os.listdir("/proc") if pid.isdigit()))
+    """
+
+    output = sandbox.run_code(code)
+
+    assert output.stdout == "False\n"
+
+
+def test_sandbox_async(sandbox_pool: CodegenSandboxPool):
+    async def run(sandboxes):
+        return await asyncio.gather(*(
+            sandbox.run_code_async(f"print('sandbox {index}')") for index, sandbox in enumerate(sandboxes)
+        ))
+
+    sandboxes = [sandbox_pool.get_sandbox("python") for _ in range(2)]
 
-def test_sandbox_with_environment():
-    sandbox = init_codegen_sandbox("python")
-    
     try:
+        outputs = asyncio.run(run(sandboxes))
+
+        assert [output.stdout for output in outputs] == ["sandbox 0\n", "sandbox 1\n"]
+    finally:
+        for sandbox in sandboxes:
+            sandbox_pool.release_sandbox(sandbox)
+
+
+def test_sandbox_with_sandbox_environment():
+    with init_codegen_sandbox("python", env_vars={"example": "1", "override": "1"}) as sandbox:
         code = """
         import os
-        print(os.environ["example"])
+        print(os.environ["example"], os.environ["override"])
         """
-        
-        output = sandbox.run_code(code, env_vars={"example": "1"})
 
-        assert "1" in output.stdout
+        output = sandbox.run_code(code, env_vars={"override": "2"})
+
+        assert output.stdout == "1 2\n"
         assert output.stderr == ""
-    finally:
-        sandbox.close()
 
 
-def test_sandbox_with_requirements():
-    sandbox = init_codegen_sandbox("python", requirements=["requests>2"])
-    
-    try:
+def test_sandbox_with_tmpfs_tmpdir():
+    with init_codegen_sandbox("python", tmpfs_tmpdir=True) as sandbox:
         code = """
-        import requests
+        with open("/proc/mounts") as mounts:
+            print(any(
+                line.split()[1:3] == ["/tmp", "tmpfs"] and "noexec" not in line.split()[3].split(",")
+                for line in mounts
+            ))
         """
-        
+
         output = sandbox.run_code(code)
-        
-        assert output.stdout == ""
+
+        assert output.stdout == "True\n"
         assert output.stderr == ""
-    finally:
-        sandbox.close()
 
 
-def test_sandbox_with_requirements_compliance():
+def test_sandbox_with_requirements(sandbox_with_requirements: BaseCodegenSandbox):
+    code = """
+    import requests
+    """
+
+    output = sandbox_with_requirements.run_code(code)
+
+    assert output.stdout == ""
+    assert output.stderr == ""
+
+    output = sandbox_with_requirements.run_requirements_compliance(["requests>2"])
+
+    assert output.stdout == ""
+    assert output.stderr == ""
+
+
+def test_sandbox_with_requirements_image_cache():
     with init_codegen_sandbox("python", requirements=["requests>2"]) as sandbox:
-        output = sandbox.run_requirements_compliance(["requests>2"])
+        image_id = sandbox.image.id
 
-        assert output.stdout == ""
-        assert output.stderr == ""
+    with init_codegen_sandbox("python", requirements=["requests>2"]) as sandbox:
+        assert sandbox.image.id == image_id
 
 
-def test_sandbox_free_requirements_compliance():
-    with init_codegen_sandbox("python") as sandbox:
-        output = sandbox.run_requirements_compliance(["requests>2"])
+def test_sandbox_free_requirements_compliance(sandbox: BaseCodegenSandbox):
+    output = sandbox.run_requirements_compliance(["requests>2"])
 
-        assert output.stdout == ""
-        assert output.stderr == "SandboxRequirementsError: requirements-free sandbox"
+    assert output.stdout == ""
+    assert output.stderr == "SandboxRequirementsError: requirements-free sandbox"
 
 
-def test_sandbox_with_timeout():
-    sandbox = init_codegen_sandbox("python")
-    
-    try:
-        code = """
-        import time
-        time.sleep(10)
-        """
-        
-        output = sandbox.run_code(code, timeout=5)
+def test_sandbox_with_timeout(sandbox: BaseCodegenSandbox):
+    code = """
+    import time
+    time.sleep(2)
+    """
 
-        assert output.stdout == ""
-        assert "exit code 124" in output.stderr
-    finally:
-        sandbox.close()
+    output = sandbox.run_code(code, timeout=1)
 
+    assert output.stdout == ""
+    assert "exit code 124" in output.stderr
 
-def test_sandbox_without_environment():
-    sandbox = init_codegen_sandbox("python")
-    
-    try:
-        code = """
-        import os
-        print(os.environ["example"])
-        """
-        
-        output = sandbox.run_code(code)
 
-        assert output.stdout == ""
-        assert "KeyError: 'example'" in output.stderr
-    finally:
-        sandbox.close()
+def test_sandbox_with_timeout_descendants(sandbox: BaseCodegenSandbox):
+    code = """
+    import subprocess
+    import time
+    subprocess.Popen(["sleep", "1000"])
+    time.sleep(2)
+    """
 
+    output = sandbox.run_code(code, timeout=1)
 
-def test_sandbox_without_requirements():
-    sandbox = init_codegen_sandbox("python")
-    
-    try:
-        code = """
-        import requests
-        """
+    assert "exit code 124" in output.stderr
 
-        output = sandbox.run_code(code)
+    code = """
+    import os
 
-        assert output.stdout == ""
-        assert "ModuleNotFoundError: No module named 'requests'" in output.stderr
-    finally:
-        sandbox.close()
+    def cmdline(pid):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as file:
+                return file.read()
+        except OSError:
+            return b""
 
+    print(any(cmdline(pid).startswith(b"sleep") for pid in os.listdir("/proc") if pid.isdigit()))
+    """
 
-def test_sandbox_without_requirements_compliance():
-    with init_codegen_sandbox("python", requirements=["requests>2"]) as sandbox:
-        output = sandbox.run_requirements_compliance(["requests<2", "numpy>2"])
+    output = sandbox.run_code(code)
 
-        assert output.stdout == ""
-        assert "SandboxRequirementsError" in output.stderr
+    assert output.stdout == "False\n"
 
-    
-def test_sandbox_without_timeout():
-    sandbox = init_codegen_sandbox("python")
-    
-    try:
-        code = """
-        import time
-        time.sleep(10)
-        """
-        
-        output = sandbox.run_code(code)
 
-        assert output.stdout == ""
-        assert output.stderr == ""
-    finally:
-        sandbox.close()
+def test_sandbox_without_environment(sandbox: BaseCodegenSandbox):
+    code = """
+    import os
+    print(os.environ["example"])
+    """
+
+    output = sandbox.run_code(code)
+
+    assert output.stdout == ""
+    assert "KeyError: 'example'" in output.stderr
+
+
+def test_sandbox_without_requirements(sandbox: BaseCodegenSandbox):
+    code = """
+    import requests
+    """
+
+    output = sandbox.run_code(code)
+
+    assert output.stdout == ""
+    assert "ModuleNotFoundError: No module named 'requests'" in output.stderr
+
+
+def test_sandbox_without_requirements_compliance(sandbox_with_requirements: BaseCodegenSandbox):
+    output = sandbox_with_requirements.run_requirements_compliance(["requests<2", "numpy>2"])
+
+    assert output.stdout == ""
+    assert "SandboxRequirementsError" in output.stderr
+
+
+def test_sandbox_without_timeout(sandbox: BaseCodegenSandbox):
+    code = """
+    import time
+    time.sleep(0.1)
+    """
+
+    output = sandbox.run_code(code)
+
+    assert output.stdout == ""
+    assert output.stderr == ""
@@ -1,7 +1,7 @@
 import pytest
 
 from codegen_sandbox.config import (
-    _mem_limit_to_int, available, readymade, _max_mem_limit, _max_cpu_quota
+    SandboxConfig, _mem_limit_to_int, available, readymade, _max_mem_limit, _max_cpu_quota
 )
 
 
@@ -10,11 +10,23 @@ def test_mem_limit_to_int():
     assert _mem_limit_to_int("1k") == 1024**1
     assert _mem_limit_to_int("1m") == 1024**2
     assert _mem_limit_to_int("1g") == 1024**3
+    assert _mem_limit_to_int("1G") == 1024**3
 
     with pytest.raises(KeyError):
         _mem_limit_to_int("1t")
 
 
+def test_mem_limit_bytes():
+    config = SandboxConfig(mem_limit="512m", cpu_quota=50000)
+    assert config.mem_limit_bytes == 512 * 1024**2
+
+
+def test_cpus():
+    assert SandboxConfig(mem_limit="128m", cpu_quota=25000).cpus == 1
+    assert SandboxConfig(mem_limit="2g", cpu_quota=100000).cpus == 1
+    assert SandboxConfig(mem_limit="4g", cpu_quota=150000).cpus == 2
+
+
 def test_available():
     for naming in available:
         config = readymade[naming]
@@ -0,0 +1,89 @@
+import pytest
+
+from codegen_sandbox import CodegenSandboxPool, init_codegen_sandbox
+
+
+def test_pool_reuse():
+    with CodegenSandboxPool() as pool:
+        sandbox = pool.get_sandbox("python")
+        container_id = sandbox.container.id
+        pool.release_sandbox(sandbox)
+
+        sandbox = pool.get_sandbox("python")
+
+        try:
+            assert sandbox.container.id == container_id
+        finally:
+            pool.release_sandbox(sandbox)
+
+
+def test_pool_reset():
+    with CodegenSandboxPool() as pool:
+        sandbox = pool.get_sandbox("python")
+        sandbox.write_file("output.txt", "hello, I'm a sandbox")
+        pool.release_sandbox(sandbox)
+
+        sandbox = pool.get_sandbox("python")
+
+        try:
+            output = sandbox.run_code("""
+            import os
+            print(os.path.exists("output.txt"))
+            """)
+
+            assert "False" in output.stdout
+        finally:
+            pool.release_sandbox(sandbox)
+
+
+def test_pool_reset_processes():
+    with CodegenSandboxPool() as pool:
+        sandbox = pool.get_sandbox("python")
+        sandbox.run_code("""
+        import subprocess
+        subprocess.Popen(["sleep", "1000"], start_new_session=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        """)
+        pool.release_sandbox(sandbox)
+
+        sandbox = pool.get_sandbox("python")
+
+        try:
+            output = sandbox.run_code("""
+            import os
+
+            def cmdline(pid):
+                try:
+                    with open(f"/proc/{pid}/cmdline", "rb") as file:
+                        return file.read()
+                except OSError:
+                    return b""
+
+            print(any(cmdline(pid).startswith(b"sleep") for pid in os.listdir("/proc") if pid.isdigit()))
+            """)
+
+            assert output.stdout == "False\n"
+        finally:
+            pool.release_sandbox(sandbox)
+
+
+def test_pool_max_idle():
+    with CodegenSandboxPool(max_idle=1) as pool:
+        pool.prewarm(2, "python")
+
+        sandbox = pool.get_sandbox("python")
+
+        try:
+            assert not pool._idle[pool._pool_key("python", None, None, "none", "small")]
+        finally:
+            pool.release_sandbox(sandbox)
+
+
+def test_pool_release_foreign_sandbox():
+    with CodegenSandboxPool() as pool, init_codegen_sandbox("python") as sandbox:
+        with pytest.raises(ValueError):
+            pool.release_sandbox(sandbox)
+
+
+def test_pool_key_requirements_order():
+    key = CodegenSandboxPool._pool_key("python", None, ["requests>2", "numpy"], "none", "small")
+    assert key == CodegenSandboxPool._pool_key("python", None, ["numpy", "requests>2", "numpy"], "none", "small")
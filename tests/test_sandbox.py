@@ -1,27 +1,43 @@
+import io
+import tarfile
+import typing
+
+import docker.errors
 import pytest
 
 from codegen_sandbox import init_codegen_sandbox, BaseCodegenSandbox, SandboxError
+import codegen_sandbox.sandbox
+from codegen_sandbox.sandbox import _allocate_cpus, _release_cpus, _ustar_archive
 
 
-@pytest.fixture(scope="function")
-def sandbox():
-    sandbox = init_codegen_sandbox("python")
-    yield sandbox
-    sandbox.close()
+@pytest.fixture(scope="module")
+def module_sandbox():
+    with init_codegen_sandbox("python") as sandbox:
+        yield sandbox
 
 
-def test_write_and_read_file(sandbox: BaseCodegenSandbox):
-    filename = "output.txt"
-    content = "hello, I'm a sandbox"
+@pytest.fixture(scope="function")
+def sandbox(module_sandbox: BaseCodegenSandbox):
+    # one container for the module, with the workspace wiped so that tests stay independent
+    module_sandbox.resume()
+    module_sandbox.reset()
+    yield module_sandbox
+    module_sandbox.pause()
+
+
+@pytest.mark.parametrize("filename,content", [
+    ("output.txt", "hello, I'm a sandbox"),
+    ("output.bin", b"\x00\x01\x02\x03"),
+    ("empty.txt", ""),
+])
+def test_write_and_read_file(sandbox: BaseCodegenSandbox, filename: str, content: typing.Any):
     sandbox.write_file(filename, content)
-    assert content == sandbox.read_file(filename)
+    output = sandbox.read_file(filename)
 
+    if isinstance(content, bytes):
+        output = output.encode("latin1")
 
-def test_write_and_read_binary_file(sandbox: BaseCodegenSandbox):
-    filename = "output.bin"
-    content = b"\x00\x01\x02\x03"
-    sandbox.write_file(filename, content)
-    assert content == sandbox.read_file(filename).encode("latin1")
+    assert content == output
 
 
 def test_delete_file(sandbox: BaseCodegenSandbox):
@@ -37,20 +53,104 @@ def test_delete_file(sandbox: BaseCodegenSandbox):
 def test_write_dir(sandbox: BaseCodegenSandbox):
     directory = "output"
     sandbox.write_dir(directory)
-    output = sandbox.container.exec_run(["sh", "-c", f"test -d {directory}"])
-    assert output.exit_code == 0
+    assert sandbox.isdir(directory)
 
 
 def test_write_nested_dir(sandbox: BaseCodegenSandbox):
     directory = "output/nested"
     sandbox.write_dir(directory)
-    output = sandbox.container.exec_run(["sh", "-c", f"test -d {directory}"])
-    assert output.exit_code == 0
+    assert sandbox.isdir("output")
+    assert sandbox.isdir(directory)
 
 
 def test_delete_dir(sandbox: BaseCodegenSandbox):
     directory = "output"
-    sandbox.write_dir(directory)
+    sandbox.write_dir(f"{directory}/nested")
     sandbox.delete_dir(directory)
-    output = sandbox.container.exec_run(["sh", "-c", f"test -d {directory}"])
-    assert output.exit_code != 0
+    assert not sandbox.isdir(directory)
+
+
+def test_write_files(sandbox: BaseCodegenSandbox):
+    files = {"output.txt": "hello, I'm a sandbox", "output/nested.txt": "hello, I'm nested"}
+    sandbox.write_files(files)
+
+    for filename, content in files.items():
+        assert content == sandbox.read_file(filename)
+
+
+def test_read_files(sandbox: BaseCodegenSandbox):
+    files = {"output.txt": "hello, I'm a sandbox", "output/nested.txt": "hello, I'm nested"}
+    sandbox.write_files(files)
+    assert files == sandbox.read_files(list(files))
+
+
+def test_write_many_files(sandbox: BaseCodegenSandbox):
+    files = {f"project/module_{index // 10}/file_{index}.txt": f"file {index}" for index in range(100)}
+    files["project/data.bin"] = b"\x00\x01\x02\x03"
+    sandbox.write_files(files)
+
+    output = sandbox.read_files(list(files))
+    output["project/data.bin"] = output["project/data.bin"].encode("latin1")
+
+    assert files == output
+
+
+def test_paused_sandbox(sandbox: BaseCodegenSandbox):
+    sandbox.pause()
+
+    with pytest.raises(SandboxError, match="sandbox is paused"):
+        sandbox.run_code("print('hello')")
+
+    with pytest.raises(SandboxError, match="sandbox is paused"):
+        list(sandbox.run_code_stream("print('hello')"))
+
+    with pytest.raises(SandboxError, match="sandbox is paused"):
+        sandbox.reset()
+
+    sandbox.resume()
+    assert sandbox.run_code("print('hello')").stdout == "hello\n"
+
+
+def test_worker_restart(sandbox: BaseCodegenSandbox):
+    sandbox.write_file("output.txt", "hello, I'm a sandbox")
+    sandbox._worker.close()
+
+    # the next request starts a new worker, while failed operations surface as errors
+    assert not sandbox.isdir("output.txt")
+    assert sandbox._worker.alive
+
+    with pytest.raises(SandboxError, match="Failed to create directory"):
+        sandbox.write_dir("output.txt/nested")
+
+
+def test_worker_start_failure(sandbox: BaseCodegenSandbox, monkeypatch: pytest.MonkeyPatch):
+    def exec_create(*args, **kwargs):
+        raise docker.errors.APIError("exec failed")
+
+    sandbox._worker.close()
+    monkeypatch.setattr(sandbox.client.api, "exec_create", exec_create)
+
+    with pytest.raises(SandboxError, match="Failed to start sandbox worker"):
+        sandbox.reset()
+
+
+def test_ustar_archive():
+    files = {"/sandbox/output.txt": b"hello, I'm a sandbox", "/sandbox/output/nested.bin": b"\x00\x01\x02\x03"}
+
+    with tarfile.open(fileobj=io.BytesIO(_ustar_archive(files))) as tar:
+        assert files == {member.name: tar.extractfile(member).read() for member in tar}
+
+    assert _ustar_archive({"/sandbox/" + "a" * 100: b""}) is None
+
+
+def test_allocate_and_release_cpus(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(codegen_sandbox.sandbox, "_free_cpus", {0, 1, 2})
+
+    assert _allocate_cpus(2) == [0, 1]
+    assert _allocate_cpus(2) is None
+    assert _allocate_cpus(1) == [2]
+
+    _release_cpus([0, 1])
+
+    assert _allocate_cpus(2) == [0, 1]
+    assert codegen_sandbox.sandbox._free_cpus == set()